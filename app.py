@@ -1,21 +1,100 @@
-from flask import Flask, request, jsonify
-from flask_cors import CORS
-from groq import Groq
+from quart import Quart, Response, request, jsonify, stream_with_context
+from quart_cors import cors
+from quart.json.provider import JSONProvider
+from werkzeug.exceptions import BadRequest, RequestEntityTooLarge
+import groq
+from groq import AsyncGroq, DefaultAsyncHttpxClient
+import httpx
+import asyncio
+import contextlib
+import gzip
+import hashlib
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import os
 import uuid
-from datetime import datetime
-import json
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+import logging
+import logging.handlers
+import re
+import time
 from typing import Dict, List, Optional
+import atexit
+import pickle
+import queue
+import threading
 import dotenv
+import orjson
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential, wait_random
+from cachetools import TTLCache
+
+# Optional dependencies for the semantic response cache
+try:
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    np = None
+    SentenceTransformer = None
+
+# Optional dependency for single-pass keyword matching (regex fallback otherwise)
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Optional dependency for shared conversation storage
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
 
 dotenv.load_dotenv()
 
-app = Flask(__name__)
+# Logging - request handlers only enqueue records; a listener thread does the
+# actual writes to stderr so requests never block on console I/O
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+
+log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+log_listener = logging.handlers.QueueListener(log_queue, _log_handler)
+log_listener.start()
+atexit.register(log_listener.stop)
+
+logger = logging.getLogger("app")
+logger.addHandler(logging.handlers.QueueHandler(log_queue))
+logger.setLevel(LOG_LEVEL)
+logger.propagate = False
+
+class ORJSONProvider(JSONProvider):
+    """JSON provider backed by orjson for faster (de)serialization"""
+
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # orjson already produces bytes, skip the str round-trip of dumps()
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS), mimetype="application/json"
+        )
+
+app = Quart(__name__)
+app.json = ORJSONProvider(app)
 # Allow all origins and common HTTP methods for frontend running on localhost or file://
-CORS(app, resources={r"/api/*": {"origins": "*"}}, supports_credentials=True, methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"])
+app = cors(app, allow_origin="*", allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"])
+# Chat payloads are small - reject oversized bodies before reading them
+app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_CONTENT_LENGTH', str(64 * 1024)))
+# Response compression for large JSON payloads (conversation histories, model lists)
+app.config['COMPRESS_MIMETYPES'] = ['application/json']
+app.config['COMPRESS_LEVEL'] = 5
+app.config['COMPRESS_MIN_SIZE'] = 1024
 
 # Configuration - Add these to your environment variables
 GROQ_API_KEY = os.getenv('GROQ_API_KEY', 'your-groq-api-key')
@@ -23,25 +102,85 @@ GROQ_API_KEY = os.getenv('GROQ_API_KEY', 'your-groq-api-key')
 # Using the latest Llama model available - update to llama-4 when available
 GROQ_MODEL = os.getenv('GROQ_MODEL', 'llama-3.1-70b-versatile')
 
+# Adaptive limit on Groq requests in flight per worker: starts at
+# GROQ_INITIAL_CONCURRENCY and moves between 1 and GROQ_MAX_CONCURRENCY
+GROQ_INITIAL_CONCURRENCY = int(os.getenv('GROQ_INITIAL_CONCURRENCY', '16'))
+GROQ_MAX_CONCURRENCY = int(os.getenv('GROQ_MAX_CONCURRENCY', '64'))
+# Mean latency (seconds) above which the limit is cut back
+GROQ_TARGET_LATENCY = float(os.getenv('GROQ_TARGET_LATENCY', '5.0'))
+# Requests-per-minute limit of your Groq tier, used to throttle before the
+# first rate-limit headers arrive (0 disables the local window)
+GROQ_RPM_LIMIT = int(os.getenv('GROQ_RPM_LIMIT', '0'))
+# Attempts per Groq call, including the first, for transient failures
+GROQ_MAX_ATTEMPTS = int(os.getenv('GROQ_MAX_ATTEMPTS', '3'))
+# Longest a request will wait for the rate-limit budget to reset - beyond
+# this the visitor is told to retry later instead of hanging
+GROQ_MAX_RATE_LIMIT_WAIT = float(os.getenv('GROQ_MAX_RATE_LIMIT_WAIT', '5'))
+
 # Email configuration
 EMAIL_HOST = os.getenv('EMAIL_HOST', 'smtp.gmail.com')
 EMAIL_PORT = int(os.getenv('EMAIL_PORT', '587'))
 EMAIL_USER = os.getenv('EMAIL_USER', 'your-email@gmail.com')
 EMAIL_PASSWORD = os.getenv('EMAIL_PASSWORD', 'your-app-password')
 ADMIN_EMAIL = os.getenv('ADMIN_EMAIL', 'admin@example.com')
+# Recycle the SMTP connection after this many messages or seconds, before
+# the server times it out or starts rejecting a long-lived session
+SMTP_MAX_MESSAGES = int(os.getenv('SMTP_MAX_MESSAGES', '100'))
+SMTP_MAX_AGE = float(os.getenv('SMTP_MAX_AGE', '100'))
+
+# Semantic cache configuration
+SEMANTIC_CACHE_MODEL = os.getenv('SEMANTIC_CACHE_MODEL', 'all-MiniLM-L6-v2')
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv('SEMANTIC_CACHE_THRESHOLD', '0.9'))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv('SEMANTIC_CACHE_MAX_ENTRIES', '5000'))
+SEMANTIC_CACHE_PATH = os.getenv('SEMANTIC_CACHE_PATH', 'semantic_cache.pkl')
 
-# Initialize Groq client
+# Conversation storage - set REDIS_URL to share conversations across workers
+REDIS_URL = os.getenv('REDIS_URL')
+CONVERSATION_TTL = int(os.getenv('CONVERSATION_TTL', '86400'))
+CONVERSATION_MAX_ENTRIES = int(os.getenv('CONVERSATION_MAX_ENTRIES', '10000'))
+# Messages kept per conversation - older ones are dropped as new ones arrive
+CONVERSATION_MAX_MESSAGES = int(os.getenv('CONVERSATION_MAX_MESSAGES', '200'))
+
+# Initialize async Groq client - requests await the LLM on the event loop
+# instead of pinning a worker thread. One shared HTTP/2 client keeps TLS
+# connections alive and multiplexes concurrent calls over them.
 try:
-    groq_client = Groq(api_key=GROQ_API_KEY)
-    print(GROQ_API_KEY)
-    print("✅ Groq client initialized successfully")
+    groq_http_client = DefaultAsyncHttpxClient(
+        http2=True,
+        timeout=httpx.Timeout(30.0, connect=5.0),
+        limits=httpx.Limits(max_keepalive_connections=100, max_connections=200),
+    )
+    # Retries are handled by create_chat_completion so every attempt goes
+    # through the rate-limit and backpressure bookkeeping
+    groq_client = AsyncGroq(api_key=GROQ_API_KEY, http_client=groq_http_client, max_retries=0)
+    logger.info("✅ Groq client initialized successfully")
 except Exception as e:
-    print(f"❌ Failed to initialize Groq client: {e}")
+    logger.error(f"❌ Failed to initialize Groq client: {e}")
     groq_client = None
 
-# In-memory storage for conversations (use database in production)
-conversations: Dict[str, List[Dict]] = {}
-conversation_metadata: Dict[str, Dict] = {}
+# Initialize embedding model for the semantic cache
+if SentenceTransformer is None:
+    logger.warning("⚠️ sentence-transformers/numpy not installed, semantic cache disabled")
+    embedding_model = None
+else:
+    try:
+        embedding_model = SentenceTransformer(SEMANTIC_CACHE_MODEL)
+        logger.info(f"✅ Semantic cache model '{SEMANTIC_CACHE_MODEL}' loaded")
+    except Exception as e:
+        logger.error(f"❌ Failed to load semantic cache model: {e}")
+        embedding_model = None
+
+# Semantic cache: a ring buffer of SEMANTIC_CACHE_MAX_ENTRIES rows. Row i of
+# cache_embeddings is the normalized embedding of the prompt that produced
+# cache_responses[i] with the model cache_models[cache_model_ids[i]]. The first
+# cache_size rows are filled and cache_next is the row overwritten next.
+cache_embeddings = None
+cache_model_ids = None
+cache_models: List[str] = []
+cache_responses: List[str] = []
+cache_size = 0
+cache_next = 0
+cache_lock = threading.Lock()
 
 class ChatResponse:
     def __init__(self, response: str, conversation_id: Optional[str] = None, error: Optional[str] = None):
@@ -57,76 +196,709 @@ class ChatResponse:
             result["error"] = self.error
         return result
 
-def call_groq_api(message):
-    """Call Groq API using official Python library"""
+@app.before_request
+async def reject_oversized_body():
+    """Answer 413 up front instead of letting handlers fail while reading the body"""
+    if request.content_length and request.content_length > app.config['MAX_CONTENT_LENGTH']:
+        return jsonify({'error': 'Request body too large'}), 413
+
+@app.after_request
+async def compress_response(response):
+    """Gzip JSON responses for clients that accept it"""
+    if (
+        response.mimetype not in app.config['COMPRESS_MIMETYPES']
+        or not 200 <= response.status_code < 300
+        or 'Content-Encoding' in response.headers
+        or not request.accept_encodings['gzip']
+    ):
+        return response
+
+    data = await response.get_data()
+    if len(data) < app.config['COMPRESS_MIN_SIZE']:
+        return response
+
+    response.set_data(gzip.compress(data, compresslevel=app.config['COMPRESS_LEVEL']))
+    response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
+
+async def read_json_body() -> Dict:
+    """Read and parse the JSON request body with orjson.
+
+    Raises RequestEntityTooLarge for bodies over MAX_CONTENT_LENGTH (including
+    chunked ones the before_request check can't see) and BadRequest for
+    anything that isn't a JSON object; both are answered by the JSON error
+    handlers below, so call this outside the handlers' catch-all `try`.
+    """
+    try:
+        data = orjson.loads(await request.get_data(cache=False))
+    except orjson.JSONDecodeError:
+        raise BadRequest("Request body must be valid JSON")
+    if not isinstance(data, dict):
+        raise BadRequest("Request body must be a JSON object")
+    return data
+
+@app.errorhandler(RequestEntityTooLarge)
+async def request_too_large(e):
+    return jsonify({'error': 'Request body too large'}), 413
+
+@app.errorhandler(BadRequest)
+async def bad_request(e):
+    return jsonify({'error': e.description}), 400
+
+def format_metadata(metadata: Dict) -> Dict:
+    """Render stored epoch timestamps (floats, or strings from Redis) as ISO 8601 UTC"""
+    return {key: datetime.fromtimestamp(float(ts), timezone.utc).isoformat() for key, ts in metadata.items()}
+
+class InMemoryConversationStore:
+    """Conversation storage in process memory (single worker only).
+
+    Bounded to `max_entries` conversations, each evicted after `ttl` seconds
+    without activity and holding at most `max_messages` recent messages, so
+    neither idle nor long-running visitors accumulate forever.
+    """
+
+    def __init__(self, max_entries: int = CONVERSATION_MAX_ENTRIES, ttl: int = CONVERSATION_TTL,
+                 max_messages: int = CONVERSATION_MAX_MESSAGES):
+        self.conversations: TTLCache = TTLCache(maxsize=max_entries, ttl=ttl)
+        self.metadata: TTLCache = TTLCache(maxsize=max_entries, ttl=ttl)
+        self.max_messages = max_messages
+
+    async def exists(self, conv_id: str) -> bool:
+        return conv_id in self.conversations
+
+    async def append_messages(self, conv_id: str, messages: List[Dict]):
+        history = self.conversations.get(conv_id)
+        if history is None:
+            history = deque(maxlen=self.max_messages)
+        history.extend(messages)
+        # Re-assign so the entry's TTL restarts on activity
+        self.conversations[conv_id] = history
+
+    async def get_messages(self, conv_id: str) -> List[Dict]:
+        return list(self.conversations.get(conv_id, []))
+
+    async def get_metadata(self, conv_id: str) -> Dict:
+        return dict(self.metadata.get(conv_id, {}))
+
+    async def update_metadata(self, conv_id: str, **fields):
+        metadata = self.metadata.get(conv_id, {})
+        metadata.update(fields)
+        self.metadata[conv_id] = metadata
+
+    async def delete(self, conv_id: str):
+        self.conversations.pop(conv_id, None)
+        self.metadata.pop(conv_id, None)
+
+    async def summaries(self) -> List[Dict]:
+        return [
+            {
+                'conversation_id': conv_id,
+                'message_count': len(messages),
+                'last_message': messages[-1] if messages else None,
+                'metadata': self.metadata.get(conv_id, {})
+            }
+            for conv_id, messages in self.conversations.items()
+        ]
+
+class RedisConversationStore:
+    """Conversation storage in Redis, shared by all workers.
+
+    Messages live in a list at chat:<id>:msgs, trimmed to the last
+    `max_messages`, and metadata in a hash at chat:<id>:meta, both expiring
+    after `ttl` seconds of inactivity. The
+    sorted set chat:index maps conversation ids to their last update time so
+    listing never has to scan the keyspace.
+    """
+
+    INDEX_KEY = "chat:index"
+
+    def __init__(self, url: str, ttl: int = CONVERSATION_TTL,
+                 max_messages: int = CONVERSATION_MAX_MESSAGES):
+        self.pool = aioredis.ConnectionPool.from_url(url)
+        self.redis = aioredis.Redis(connection_pool=self.pool)
+        self.ttl = ttl
+        self.max_messages = max_messages
+
+    @staticmethod
+    def _msgs_key(conv_id: str) -> str:
+        return f"chat:{conv_id}:msgs"
+
+    @staticmethod
+    def _meta_key(conv_id: str) -> str:
+        return f"chat:{conv_id}:meta"
+
+    async def exists(self, conv_id: str) -> bool:
+        return bool(await self.redis.exists(self._msgs_key(conv_id)))
+
+    async def append_messages(self, conv_id: str, messages: List[Dict]):
+        key = self._msgs_key(conv_id)
+        now = time.time()
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.rpush(key, *(orjson.dumps(msg) for msg in messages))
+            pipe.ltrim(key, -self.max_messages, -1)
+            pipe.expire(key, self.ttl)
+            pipe.zadd(self.INDEX_KEY, {conv_id: now})
+            # Drop index entries whose conversations have expired
+            pipe.zremrangebyscore(self.INDEX_KEY, "-inf", now - self.ttl)
+            await pipe.execute()
+
+    async def get_messages(self, conv_id: str) -> List[Dict]:
+        return [orjson.loads(msg) for msg in await self.redis.lrange(self._msgs_key(conv_id), 0, -1)]
+
+    async def get_metadata(self, conv_id: str) -> Dict:
+        metadata = await self.redis.hgetall(self._meta_key(conv_id))
+        return {key.decode(): value.decode() for key, value in metadata.items()}
+
+    async def update_metadata(self, conv_id: str, **fields):
+        key = self._meta_key(conv_id)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hset(key, mapping=fields)
+            pipe.expire(key, self.ttl)
+            await pipe.execute()
+
+    async def delete(self, conv_id: str):
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.delete(self._msgs_key(conv_id), self._meta_key(conv_id))
+            pipe.zrem(self.INDEX_KEY, conv_id)
+            await pipe.execute()
+
+    async def summaries(self) -> List[Dict]:
+        conv_ids = [conv_id.decode() for conv_id in await self.redis.zrevrange(self.INDEX_KEY, 0, -1)]
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for conv_id in conv_ids:
+                pipe.llen(self._msgs_key(conv_id))
+                pipe.lindex(self._msgs_key(conv_id), -1)
+                pipe.hgetall(self._meta_key(conv_id))
+            results = await pipe.execute()
+
+        summaries = []
+        for conv_id, (count, last, metadata) in zip(conv_ids, zip(*[iter(results)] * 3)):
+            if not count:
+                # Expired between index trims
+                continue
+            summaries.append({
+                'conversation_id': conv_id,
+                'message_count': count,
+                'last_message': orjson.loads(last) if last else None,
+                'metadata': {key.decode(): value.decode() for key, value in metadata.items()}
+            })
+        return summaries
+
+# Initialize conversation storage
+if REDIS_URL and aioredis is not None:
+    try:
+        conversation_store = RedisConversationStore(REDIS_URL)
+        logger.info("✅ Using Redis conversation storage")
+    except Exception as e:
+        logger.error(f"❌ Failed to initialize Redis storage, falling back to memory: {e}")
+        conversation_store = InMemoryConversationStore()
+else:
+    if REDIS_URL:
+        logger.warning("⚠️ redis not installed, using in-memory conversation storage")
+    conversation_store = InMemoryConversationStore()
+
+class BackpressureController:
+    """AIMD concurrency control for Groq calls.
+
+    The limit grows by `increase` after each call while windowed mean latency
+    stays within target, and is multiplied by `decrease` on rate limits,
+    server errors or latency overruns. A cut happens at most once per
+    congestion event: results from calls dispatched before the last cut
+    describe the same event and are ignored.
+    """
+
+    def __init__(self, initial: float, min_limit: float = 1, max_limit: float = 64,
+                 target_latency: float = 5.0, window: int = 20,
+                 increase: float = 0.5, decrease: float = 0.5):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.current_limit = float(min(max(initial, min_limit), max_limit))
+        self.target_latency = target_latency
+        self.increase = increase
+        self.decrease = decrease
+        self.latencies: deque = deque(maxlen=window)
+        self._latency_sum = 0.0
+        self._last_cut = float("-inf")
+        self.in_flight = 0
+        self._cond = asyncio.Condition()
+
+    @property
+    def mean_latency(self) -> float:
+        return self._latency_sum / len(self.latencies) if self.latencies else 0.0
+
+    async def acquire(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < int(self.current_limit))
+            self.in_flight += 1
+
+    async def release(self):
+        async with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    @staticmethod
+    def is_overload(error: Exception) -> bool:
+        """Whether an error means Groq is pushing back (429 or 5xx)"""
+        if isinstance(error, groq.APIStatusError):
+            return error.status_code == 429 or error.status_code >= 500
+        return "rate_limit" in str(error).lower()
+
+    def on_result(self, latency: float, error: Optional[Exception] = None,
+                  started: Optional[float] = None):
+        """Record a finished call and adjust the limit.
+
+        `started` is the call's time.monotonic() dispatch time, defaulting to
+        `latency` seconds ago.
+        """
+        if started is None:
+            started = time.monotonic() - latency
+        if started <= self._last_cut:
+            # Already in flight when the limit was cut - same congestion event
+            return
+
+        if error is not None:
+            if self.is_overload(error):
+                self._cut()
+            return
+
+        if len(self.latencies) == self.latencies.maxlen:
+            self._latency_sum -= self.latencies[0]
+        self.latencies.append(latency)
+        self._latency_sum += latency
+
+        if self.mean_latency <= self.target_latency:
+            self._set_limit(self.current_limit + self.increase)
+        else:
+            self._cut()
+            # Start the window afresh so the slow samples that caused this cut
+            # can't trigger another one or hold back recovery
+            self.latencies.clear()
+            self._latency_sum = 0.0
+
+    def _cut(self):
+        self._set_limit(self.current_limit * self.decrease)
+        self._last_cut = time.monotonic()
+
+    def _set_limit(self, limit: float):
+        self.current_limit = min(max(limit, self.min_limit), self.max_limit)
+
+    @contextlib.asynccontextmanager
+    async def slot(self):
+        """Hold one concurrency slot while a Groq call is in flight.
+
+        Latency is not sampled here - create_chat_completion reports each
+        attempt itself, so retry backoff and slow stream readers don't count.
+        """
+        await self.acquire()
+        try:
+            yield
+        finally:
+            await self.release()
+
+groq_backpressure = BackpressureController(
+    GROQ_INITIAL_CONCURRENCY,
+    max_limit=GROQ_MAX_CONCURRENCY,
+    target_latency=GROQ_TARGET_LATENCY,
+)
+
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+def parse_duration(value: Optional[str]) -> float:
+    """Parse Groq reset durations such as '7.66s', '2m59.56s' or '250ms' into seconds"""
+    if not value:
+        return 0.0
+    try:
+        return float(value)
+    except ValueError:
+        return sum(float(n) * _DURATION_UNITS[unit] for n, unit in _DURATION_RE.findall(value))
+
+class RateLimitExceeded(Exception):
+    """The Groq budget resets later than a request is willing to wait"""
+
+@dataclass
+class RateLimitState:
+    """Groq rate-limit budget learned from x-ratelimit-* / retry-after headers.
+
+    Dispatch pauses while Groq asked us to back off, when the daily request
+    budget is down to its last couple of requests, or when less than 10% of
+    the per-minute token budget is left. Deadlines are time.monotonic() values.
+    """
+    remaining_requests: Optional[int] = None
+    remaining_tokens: Optional[int] = None
+    limit_tokens: Optional[int] = None
+    requests_reset_at: float = 0.0
+    tokens_reset_at: float = 0.0
+    retry_after_until: float = 0.0
+    rpm_limit: int = GROQ_RPM_LIMIT
+    dispatched: deque = field(default_factory=deque)
+
+    def update(self, headers):
+        """Refresh the budget from a Groq response's headers"""
+        now = time.monotonic()
+        if headers.get("x-ratelimit-remaining-requests") is not None:
+            self.remaining_requests = int(headers["x-ratelimit-remaining-requests"])
+            self.requests_reset_at = now + parse_duration(headers.get("x-ratelimit-reset-requests"))
+        if headers.get("x-ratelimit-remaining-tokens") is not None:
+            self.remaining_tokens = int(headers["x-ratelimit-remaining-tokens"])
+            self.tokens_reset_at = now + parse_duration(headers.get("x-ratelimit-reset-tokens"))
+        if headers.get("x-ratelimit-limit-tokens") is not None:
+            self.limit_tokens = int(headers["x-ratelimit-limit-tokens"])
+        if headers.get("retry-after") is not None:
+            self.retry_after_until = now + parse_duration(headers["retry-after"])
+
+    def delay(self) -> float:
+        """Seconds to wait before the next dispatch is within budget"""
+        now = time.monotonic()
+        wait_until = self.retry_after_until
+        if self.remaining_requests is not None and self.remaining_requests <= 2:
+            wait_until = max(wait_until, self.requests_reset_at)
+        if (self.remaining_tokens is not None and self.limit_tokens
+                and self.remaining_tokens < 0.1 * self.limit_tokens):
+            wait_until = max(wait_until, self.tokens_reset_at)
+        if self.rpm_limit:
+            while self.dispatched and now - self.dispatched[0] >= 60:
+                self.dispatched.popleft()
+            if len(self.dispatched) >= self.rpm_limit:
+                wait_until = max(wait_until, self.dispatched[0] + 60)
+        return max(0.0, wait_until - now)
+
+    async def wait_for_capacity(self, max_wait: float = GROQ_MAX_RATE_LIMIT_WAIT):
+        """Sleep until dispatching another request is within budget.
+
+        Raises RateLimitExceeded instead when the budget won't be back within
+        `max_wait` seconds (e.g. the daily request budget ran out).
+        """
+        delay = self.delay()
+        while delay > 0:
+            if delay > max_wait:
+                raise RateLimitExceeded(f"Groq rate limit exhausted, resets in {delay:.0f}s")
+            logger.warning(f"Groq rate limit nearly exhausted, pausing dispatch for {delay:.1f}s")
+            await asyncio.sleep(delay)
+            delay = self.delay()
+        # Count this dispatch locally until the response tells us the real budget
+        if self.remaining_requests:
+            self.remaining_requests -= 1
+        if self.rpm_limit:
+            self.dispatched.append(time.monotonic())
+
+groq_rate_limits = RateLimitState()
+
+_retry_backoff = wait_exponential(multiplier=0.5, min=0.5, max=8) + wait_random(0, 0.5)
+
+def groq_retry_wait(retry_state) -> float:
+    """Exponential backoff with jitter, stretched to honor retry-after on 429s"""
+    delay = _retry_backoff(retry_state)
+    error = retry_state.outcome.exception()
+    if isinstance(error, groq.RateLimitError):
+        retry_after = parse_duration(error.response.headers.get("retry-after"))
+        if retry_after > GROQ_MAX_RATE_LIMIT_WAIT:
+            # Too long to wait - the next attempt's wait_for_capacity gives up at once
+            return 0.0
+        delay = max(delay, retry_after)
+    return delay
+
+def report_groq_retry(retry_state):
+    """Log a failed attempt before backing off"""
+    error = retry_state.outcome.exception()
+    logger.warning(f"Groq attempt {retry_state.attempt_number} failed, retrying: {error}")
+
+@retry(
+    retry=retry_if_exception_type((groq.RateLimitError, groq.APIConnectionError, groq.InternalServerError)),
+    wait=groq_retry_wait,
+    stop=stop_after_attempt(GROQ_MAX_ATTEMPTS),
+    before_sleep=report_groq_retry,
+    reraise=True,
+)
+async def create_chat_completion(**params):
+    """Send one chat completion request, retrying 429/5xx/connection errors"""
+    await groq_rate_limits.wait_for_capacity()
+    started = time.monotonic()
+    try:
+        raw_response = await groq_client.chat.completions.with_raw_response.create(**params)
+    except Exception as e:
+        if isinstance(e, groq.APIStatusError):
+            groq_rate_limits.update(e.response.headers)
+        groq_backpressure.on_result(time.monotonic() - started, e, started)
+        raise
+    # Sample this attempt only, up to the response headers - for a stream that
+    # is time to first byte, not however long the reply takes to be read
+    groq_backpressure.on_result(time.monotonic() - started, started=started)
+    groq_rate_limits.update(raw_response.headers)
+    return await raw_response.parse()
+
+SYSTEM_PROMPT = (
+    "You are an assistant for Abu Sayed's developer portfolio. "
+    "You are talking to a potential HR, manager, or developer who "
+    "is visiting the portfolio and helping them with their queries. "
+    "You should be professional and provide accurate information. "
+    "Return responses in markdown format."
+)
+# Built once and shared by every request - treat as read-only
+SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_PROMPT}
+
+def build_groq_messages(message) -> List[Dict]:
+    """Build the prompt. If `message` is already a list of chat dictionaries, we
+    append it after the system prompt. Otherwise we wrap the single user
+    message in the expected format."""
+    if isinstance(message, list):
+        return [SYSTEM_MESSAGE, *message]
+    return [SYSTEM_MESSAGE, {"role": "user", "content": message}]
+
+def groq_error(e: Exception, model: Optional[str] = None) -> Exception:
+    """Translate a Groq client error into a user-facing exception"""
+    logger.error(f"❌ Groq API error: {e}")
+    
+    # Handle specific error types
+    if "invalid_api_key" in str(e).lower():
+        return Exception("Invalid API key. Please check your GROQ_API_KEY.")
+    elif isinstance(e, RateLimitExceeded) or "rate_limit" in str(e).lower():
+        return Exception("Rate limit exceeded. Please try again later.")
+    elif "model_not_found" in str(e).lower():
+        return Exception(f"Model '{model or GROQ_MODEL}' not found. Please check available models.")
+    elif "insufficient_quota" in str(e).lower():
+        return Exception("Insufficient quota. Please check your Groq account.")
+    else:
+        return Exception(f"Groq API error: {str(e)}")
+
+async def call_groq_api(message, model: Optional[str] = None):
+    """Call Groq API using official async Python library"""
     if not groq_client:
         raise Exception("Groq client not initialized. Please check your API key.")
     
+    model = model or GROQ_MODEL
     try:
-        print(f"Making API request using Groq Python library")
-        print(f"Using model: {GROQ_MODEL}")
+        logger.info("Making API request using Groq Python library")
+        logger.info(f"Using model: {model}")
         # Log the type and size of the incoming message for easier debugging
         if isinstance(message, list):
-            print(f"Incoming message is a list with {len(message)} item(s)")
+            logger.info(f"Incoming message is a list with {len(message)} item(s)")
         else:
-            print(f"Incoming message is a str of length {len(message)}")
+            logger.info(f"Incoming message is a str of length {len(message)}")
         
         # Create chat completion using Groq client
-        chat_completion = groq_client.chat.completions.create(
-            # Build the prompt. If `message` is already a list of chat dictionaries, we
-            # append it after the system prompt. Otherwise we wrap the single user
-            # message in the expected format.
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You are an assistant for Abu Sayed's developer portfolio. "
-                        "You are talking to a potential HR, manager, or developer who "
-                        "is visiting the portfolio and helping them with their queries. "
-                        "You should be professional and provide accurate information. "
-                        "Return responses in markdown format."
-                    ),
-                }
-            ] + (
-                message if isinstance(message, list) else [{"role": "user", "content": message}]
-            ),
-            model=GROQ_MODEL,
-            max_tokens=1000,
-            temperature=0.7,
-            top_p=1,
-            stream=False
-        )
+        async with groq_backpressure.slot():
+            chat_completion = await create_chat_completion(
+                messages=build_groq_messages(message),
+                model=model,
+                max_tokens=1000,
+                temperature=0.7,
+                top_p=1,
+                stream=False
+            )
         
         response_content = chat_completion.choices[0].message.content
-        print(f"✅ API call successful, response length: {len(response_content)}")
+        logger.info(f"✅ API call successful, response length: {len(response_content)}")
         
         return response_content
     
     except Exception as e:
-        print(f"❌ Groq API error: {e}")
+        raise groq_error(e, model)
+
+async def stream_groq_api(message, model: Optional[str] = None):
+    """Call Groq API with streaming enabled, yielding content deltas as they arrive"""
+    if not groq_client:
+        raise Exception("Groq client not initialized. Please check your API key.")
+    
+    model = model or GROQ_MODEL
+    try:
+        logger.info("Making streaming API request using Groq Python library")
+        logger.info(f"Using model: {model}")
         
-        # Handle specific error types
-        if "invalid_api_key" in str(e).lower():
-            raise Exception("Invalid API key. Please check your GROQ_API_KEY.")
-        elif "rate_limit" in str(e).lower():
-            raise Exception("Rate limit exceeded. Please try again later.")
-        elif "model_not_found" in str(e).lower():
-            raise Exception(f"Model '{GROQ_MODEL}' not found. Please check available models.")
-        elif "insufficient_quota" in str(e).lower():
-            raise Exception("Insufficient quota. Please check your Groq account.")
+        # The slot is held until the stream is fully consumed; only opening the
+        # stream is retried, never a partially delivered reply
+        async with groq_backpressure.slot():
+            chat_completion = await create_chat_completion(
+                messages=build_groq_messages(message),
+                model=model,
+                max_tokens=1000,
+                temperature=0.7,
+                top_p=1,
+                stream=True
+            )
+            
+            async for chunk in chat_completion:
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield delta
+    
+    except Exception as e:
+        raise groq_error(e, model)
+
+# Upstream calls currently in flight, keyed by normalized prompt + model, so
+# concurrent identical prompts share a single Groq round-trip. Each call runs
+# as its own task, so one visitor disconnecting doesn't cancel it for the rest.
+inflight: Dict[str, asyncio.Task] = {}
+
+def coalesce_key(message: str) -> str:
+    """Key identifying identical prompts for the current model"""
+    normalized = f"{GROQ_MODEL}\0{message.lower().strip()}"
+    return hashlib.blake2b(normalized.encode(), digest_size=16).hexdigest()
+
+async def _shared_groq_call(message: str, embedding) -> str:
+    """Run one upstream call and cache its answer once for all waiters"""
+    # Pin the model so a concurrent /api/switch-model can't mislabel the answer
+    model = GROQ_MODEL
+    response = await call_groq_api(message, model)
+    store_cached_response(embedding, response, model)
+    return response
+
+def _finish_inflight(key: str, task: asyncio.Task):
+    inflight.pop(key, None)
+    if not task.cancelled():
+        # Mark the exception retrieved in case every waiter went away
+        task.exception()
+
+async def coalesced_groq_call(message: str, embedding=None) -> str:
+    """Call Groq, sharing the result with concurrent requests for the same prompt.
+
+    `embedding` is the prompt's semantic cache embedding; the response is
+    stored under it once, however many requests joined the call.
+    """
+    key = coalesce_key(message)
+    task = inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(_shared_groq_call(message, embedding))
+        task.add_done_callback(lambda t: _finish_inflight(key, t))
+        inflight[key] = task
+    else:
+        logger.info("Coalescing with in-flight request for identical prompt")
+    # shield so a cancelled (disconnected) request doesn't cancel the shared call
+    return await asyncio.shield(task)
+
+def load_semantic_cache():
+    """Allocate the semantic cache and load persisted entries from disk"""
+    global cache_embeddings, cache_model_ids
+    if not embedding_model:
+        return
+
+    dim = embedding_model.get_sentence_embedding_dimension()
+    cache_embeddings = np.zeros((SEMANTIC_CACHE_MAX_ENTRIES, dim), dtype=np.float32)
+    cache_model_ids = np.full(SEMANTIC_CACHE_MAX_ENTRIES, -1, dtype=np.int32)
+    if not os.path.exists(SEMANTIC_CACHE_PATH):
+        return
+
+    try:
+        with open(SEMANTIC_CACHE_PATH, 'rb') as f:
+            data = pickle.load(f)
+        if 'models' not in data:
+            logger.info("Ignoring semantic cache saved without model names")
+            return
+        if data['embeddings'].shape[1] == dim:
+            # Oldest first, so replaying the stores keeps the eviction order
+            for embedding, response, model in zip(data['embeddings'], data['responses'], data['models']):
+                store_cached_response(embedding, response, model)
+            logger.info(f"✅ Loaded {cache_size} semantic cache entries")
+    except Exception as e:
+        logger.error(f"Failed to load semantic cache: {e}")
+
+def save_semantic_cache():
+    """Persist semantic cache entries to disk (called on shutdown)"""
+    if not embedding_model or not cache_size:
+        return
+
+    try:
+        with cache_lock:
+            # Oldest first: once the buffer has wrapped, that's cache_next onwards
+            order = np.roll(np.arange(cache_size), -cache_next if cache_size == SEMANTIC_CACHE_MAX_ENTRIES else 0)
+            data = {
+                'embeddings': cache_embeddings[order],
+                'responses': [cache_responses[i] for i in order],
+                'models': [cache_models[cache_model_ids[i]] for i in order],
+            }
+        # Write to a per-process temp file and swap it in, so workers exiting
+        # together can't interleave writes and corrupt the cache file
+        tmp_path = f"{SEMANTIC_CACHE_PATH}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(data, f)
+        os.replace(tmp_path, SEMANTIC_CACHE_PATH)
+    except Exception as e:
+        logger.error(f"Failed to save semantic cache: {e}")
+
+def lookup_cached_response(message: str, model: Optional[str] = None):
+    """Return (cached_response, embedding) for the closest previous prompt.
+
+    Only answers produced by `model` (default: the current GROQ_MODEL) are
+    considered. cached_response is None on a miss; the embedding is returned
+    so the caller can store it alongside the fresh response without encoding
+    twice.
+    """
+    if not embedding_model:
+        return None, None
+
+    model = model or GROQ_MODEL
+    q = embedding_model.encode([message], normalize_embeddings=True)[0].astype(np.float32)
+    with cache_lock:
+        if model not in cache_models or not cache_size:
+            return None, q
+        sims = cache_embeddings[:cache_size] @ q
+        sims[cache_model_ids[:cache_size] != cache_models.index(model)] = -1.0
+        best = int(sims.argmax())
+        if sims[best] >= SEMANTIC_CACHE_THRESHOLD:
+            logger.info(f"Semantic cache hit (similarity {sims[best]:.3f})")
+            return cache_responses[best], q
+    return None, q
+
+def store_cached_response(embedding, response: str, model: Optional[str] = None):
+    """Add a prompt embedding/response pair for `model` to the semantic cache"""
+    global cache_size, cache_next
+    if embedding is None:
+        return
+
+    model = model or GROQ_MODEL
+    with cache_lock:
+        if model not in cache_models:
+            cache_models.append(model)
+        # Overwrite the oldest row in place once the cache is full
+        row = cache_next
+        cache_embeddings[row] = embedding
+        cache_model_ids[row] = cache_models.index(model)
+        if row < len(cache_responses):
+            cache_responses[row] = response
         else:
-            raise Exception(f"Groq API error: {str(e)}")
+            cache_responses.append(response)
+        cache_next = (row + 1) % SEMANTIC_CACHE_MAX_ENTRIES
+        cache_size = min(cache_size + 1, SEMANTIC_CACHE_MAX_ENTRIES)
+
+load_semantic_cache()
+atexit.register(save_semantic_cache)
 
-def get_available_models() -> List[str]:
+# Groq's model list changes rarely, so avoid a round-trip on every request.
+# With Redis configured the list is also shared by all workers.
+MODELS_CACHE_TTL = 300
+MODELS_CACHE_KEY = "groq:models"
+_models_cache = {"ts": 0.0, "data": None}
+
+def shared_redis():
+    """Redis client shared by all workers, or None when Redis isn't configured"""
+    return getattr(conversation_store, "redis", None)
+
+async def get_available_models() -> List[str]:
     """Get list of available Groq models"""
+    if _models_cache["data"] and time.monotonic() - _models_cache["ts"] < MODELS_CACHE_TTL:
+        return _models_cache["data"]
+
+    redis_client = shared_redis()
+    if redis_client is not None:
+        try:
+            cached = await redis_client.get(MODELS_CACHE_KEY)
+            if cached:
+                _models_cache["data"] = orjson.loads(cached)
+                _models_cache["ts"] = time.monotonic()
+                return _models_cache["data"]
+        except Exception as e:
+            logger.warning(f"Failed to read shared model cache: {e}")
+
     try:
         if not groq_client:
             return []
         
-        models = groq_client.models.list()
-        return [model.id for model in models.data if 'llama' in model.id.lower()]
+        models = await groq_client.models.list()
+        _models_cache["data"] = [model.id for model in models.data if 'llama' in model.id.lower()]
+        _models_cache["ts"] = time.monotonic()
     except Exception as e:
-        print(f"Failed to fetch models: {e}")
+        logger.warning(f"Failed to fetch models: {e}")
         # Return known Llama models as fallback
         return [
             'llama-3.1-70b-versatile',
@@ -137,6 +909,13 @@ def get_available_models() -> List[str]:
             'llama-3.2-1b-preview'
         ]
 
+    if redis_client is not None:
+        try:
+            await redis_client.set(MODELS_CACHE_KEY, orjson.dumps(_models_cache["data"]), ex=MODELS_CACHE_TTL)
+        except Exception as e:
+            logger.warning(f"Failed to write shared model cache: {e}")
+    return _models_cache["data"]
+
 def send_contact_email(from_email: str, message: str, name: str | None = None):
     """Wrapper around send_email to send portfolio contact."""
     subject = "Portfolio contact from {}".format(name or from_email or "visitor")
@@ -144,79 +923,262 @@ def send_contact_email(from_email: str, message: str, name: str | None = None):
     return send_email(subject, body, user_email=from_email)
 
 
-def send_email(subject: str, body: str, user_email: str = None):
-    """Send email notification to admin"""
+def build_email(subject: str, body: str, user_email: str = None) -> str:
+    """Build the raw admin notification email"""
+    msg = MIMEMultipart()
+    msg['From'] = EMAIL_USER
+    msg['To'] = ADMIN_EMAIL
+    msg['Subject'] = subject
+
+    # Add user email to body if provided
+    if user_email:
+        body = f"From: {user_email}\n\n{body}"
+
+    msg.attach(MIMEText(body, 'plain'))
+    return msg.as_string()
+
+def open_smtp_connection() -> smtplib.SMTP:
+    """Open and authenticate a new SMTP connection"""
+    server = smtplib.SMTP(EMAIL_HOST, EMAIL_PORT, timeout=30)
+    server.starttls()
+    server.login(EMAIL_USER, EMAIL_PASSWORD)
+    return server
+
+def close_smtp_connection(server: Optional[smtplib.SMTP]):
+    """Close an SMTP connection, ignoring errors from already-dead sockets"""
+    if server is None:
+        return
     try:
-        msg = MIMEMultipart()
-        msg['From'] = EMAIL_USER
-        msg['To'] = ADMIN_EMAIL
-        msg['Subject'] = subject
-        
-        # Add user email to body if provided
-        if user_email:
-            body = f"From: {user_email}\n\n{body}"
-        
-        msg.attach(MIMEText(body, 'plain'))
-        
-        server = smtplib.SMTP(EMAIL_HOST, EMAIL_PORT)
-        server.starttls()
-        server.login(EMAIL_USER, EMAIL_PASSWORD)
-        text = msg.as_string()
-        server.sendmail(EMAIL_USER, ADMIN_EMAIL, text)
         server.quit()
-        
-        return True
-    except Exception as e:
-        print(f"Email sending failed: {str(e)}")
-        return False
+    except Exception:
+        server.close()
+
+# Emails are queued here and sent by a single background worker so the
+# request never waits on SMTP
+email_queue: "queue.Queue[tuple]" = queue.Queue()
+
+def _email_worker():
+    """Send queued emails, keeping one SMTP connection open across messages"""
+    server = None
+    opened_at = 0.0
+    messages_sent = 0
+    while True:
+        subject, body, user_email = email_queue.get()
+        try:
+            text = build_email(subject, body, user_email)
+            if server is not None and (messages_sent >= SMTP_MAX_MESSAGES
+                                       or time.monotonic() - opened_at >= SMTP_MAX_AGE):
+                close_smtp_connection(server)
+                server = None
+            try:
+                if server is None:
+                    server = open_smtp_connection()
+                    opened_at, messages_sent = time.monotonic(), 0
+                server.sendmail(EMAIL_USER, ADMIN_EMAIL, text)
+            except smtplib.SMTPServerDisconnected:
+                # The server dropped our idle connection - reconnect once
+                close_smtp_connection(server)
+                server = open_smtp_connection()
+                opened_at, messages_sent = time.monotonic(), 0
+                server.sendmail(EMAIL_USER, ADMIN_EMAIL, text)
+            messages_sent += 1
+            logger.info(f"✅ Email sent: {subject}")
+        except Exception as e:
+            logger.error(f"Email sending failed: {str(e)}")
+            close_smtp_connection(server)
+            server = None
+        finally:
+            email_queue.task_done()
+
+threading.Thread(target=_email_worker, name="email-worker", daemon=True).start()
 
-def detect_contact_intent(message: str) -> bool:
+@atexit.register
+def drain_email_queue(timeout: float = 30.0):
+    """Give the worker a chance to send queued emails before the process exits"""
+    deadline = time.monotonic() + timeout
+    while email_queue.unfinished_tasks and time.monotonic() < deadline:
+        time.sleep(0.1)
+    if email_queue.unfinished_tasks:
+        logger.warning(f"Exiting with {email_queue.unfinished_tasks} unsent email(s)")
+
+def send_email(subject: str, body: str, user_email: str = None):
+    """Queue an email notification to admin"""
+    email_queue.put((subject, body, user_email))
+    return True
+
+contact_keywords = [
+    "contact you", "reach out", "send message", "talk to developer",
+    "speak to admin", "feedback", "report issue", "suggestion",
+    "contact admin", "message you", "get in touch", "talk to you",
+    "want to tell you", "need to contact", "reach admin"
+]
+
+contact_indicators = ["tell you", "message:", "say:", "feedback:", "report:", "contact you about"]
+
+def build_keyword_matcher(words: List[str]):
+    """Compile keywords into a single-pass matcher.
+
+    The returned function takes lowercased text and returns the end index of
+    the first keyword match, or None. Uses an Aho-Corasick automaton when
+    pyahocorasick is installed, otherwise one compiled regex alternation.
+    """
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for word in words:
+            automaton.add_word(word, word)
+        automaton.make_automaton()
+
+        def first_match_end(text: str) -> Optional[int]:
+            match = next(automaton.iter(text), None)
+            return match[0] + 1 if match else None
+    else:
+        pattern = re.compile("|".join(map(re.escape, words)))
+
+        def first_match_end(text: str) -> Optional[int]:
+            match = pattern.search(text)
+            return match.end() if match else None
+
+    return first_match_end
+
+_intent_matcher = build_keyword_matcher(contact_keywords)
+_indicator_matcher = build_keyword_matcher(contact_indicators)
+
+# A message with none of the keywords' first letters can't contain one
+_INTENT_FIRST_CHARS = frozenset(keyword[0] for keyword in contact_keywords)
+
+def detect_contact_intent(message: str, message_lower: Optional[str] = None) -> bool:
     """Detect if user wants to contact the admin"""
-    contact_keywords = [
-        "contact you", "reach out", "send message", "talk to developer",
-        "speak to admin", "feedback", "report issue", "suggestion",
-        "contact admin", "message you", "get in touch", "talk to you",
-        "want to tell you", "need to contact", "reach admin"
-    ]
-    
-    message_lower = message.lower()
-    return any(keyword in message_lower for keyword in contact_keywords)
+    if message_lower is None:
+        message_lower = message.lower()
+    if _INTENT_FIRST_CHARS.isdisjoint(message_lower):
+        return False
+    return _intent_matcher(message_lower) is not None
 
-import re
+_EMAIL_RE = re.compile(r"[\w\.-]+@[\w\.-]+")
+_NAME_RE = re.compile(r"(?:my name is|i am|this is)\s+([A-Za-z\s]{2,40})", re.IGNORECASE)
 
 def extract_contact_info(message: str) -> dict:
     """Extract basic contact info such as email and name from the message."""
     info = {}
     # Email regex
-    email_match = re.search(r"[\w\.-]+@[\w\.-]+", message)
+    email_match = _EMAIL_RE.search(message)
     if email_match:
         info["email"] = email_match.group(0)
 
     # Very naive name extraction – looks for patterns like "my name is X" or "I am X"
-    name_match = re.search(r"(?:my name is|i am|this is)\s+([A-Za-z\s]{2,40})", message, re.IGNORECASE)
+    name_match = _NAME_RE.search(message)
     if name_match:
         info["name"] = name_match.group(1).strip()
     return info
 
 
-def extract_contact_message(message: str) -> str:
+def extract_contact_message(message: str, message_lower: Optional[str] = None) -> str:
     """Extract the actual message user wants to send"""
     # Simple extraction - in production, you might want more sophisticated parsing
-    contact_indicators = ["tell you", "message:", "say:", "feedback:", "report:", "contact you about"]
-    
-    for indicator in contact_indicators:
-        if indicator in message.lower():
-            parts = message.lower().split(indicator)
-            if len(parts) > 1:
-                return parts[1].strip()
+    if message_lower is None:
+        message_lower = message.lower()
+    end = _indicator_matcher(message_lower)
+    if end is not None:
+        # Slice the original text to keep the visitor's casing, unless
+        # lowercasing changed the length (e.g. "İ") and the index won't line up
+        source = message if len(message) == len(message_lower) else message_lower
+        return source[end:].strip()
     
     return message
 
+async def finish_chat_turn(conversation_id: Optional[str], message: str, chat_response: str,
+                           user_email: Optional[str] = None, contact_intent: bool = False,
+                           message_lower: Optional[str] = None):
+    """Persist a chat turn and handle contact intent.
+
+    Returns the conversation id and the response to show the visitor.
+    """
+    # --- Persist conversation ----
+    if not conversation_id:
+        conversation_id = str(uuid.uuid4())
+
+    await conversation_store.append_messages(conversation_id, [
+        {"role": "user", "content": message},
+        {"role": "assistant", "content": chat_response},
+    ])
+
+    # Store some lightweight metadata (timestamp of last activity)
+    await conversation_store.update_metadata(conversation_id, updated_at=time.time())
+
+    # Handle contact intent – ensure we have enough info before sending email
+    if contact_intent:
+        contact_info = extract_contact_info(message)
+        contact_message = extract_contact_message(message, message_lower)
+        visitor_email = contact_info.get("email") or user_email
+        visitor_name = contact_info.get("name")
+
+        if not visitor_email:
+            chat_response = (
+                "I'd be happy to pass your message along to Abu Sayed. "
+                "Could you please provide your email address or other info so he can get back to you?"
+            )
+        else:
+            send_contact_email(visitor_email, contact_message, name=visitor_name)
+            chat_response += (
+                "\n\nYour message has been sent to Abu Sayed. "
+                "Thank you for reaching out - he will respond as soon as possible."
+            )
+
+    return conversation_id, chat_response
+
+def sse_event(payload: Dict) -> bytes:
+    """Format a payload as a Server-Sent Events message"""
+    return b"data: " + orjson.dumps(payload) + b"\n\n"
+
+def wants_stream(data: Dict) -> bool:
+    """Whether the client asked for a streamed (SSE) chat response"""
+    return (request.path == '/api/chat/stream' or bool(data.get("stream"))
+            or request.accept_mimetypes.best == "text/event-stream")
+
+def stream_chat(message: str, conversation_id: Optional[str], user_email: Optional[str],
+                contact_intent: bool, message_lower: str) -> Response:
+    """Stream the assistant reply as SSE `delta` events.
+
+    The final event carries the conversation id and the full response, which
+    may differ from the streamed text when contact handling kicks in.
+    """
+    @stream_with_context
+    async def generate():
+        try:
+            model = GROQ_MODEL
+            cached, embedding = None, None
+            if not contact_intent:
+                cached, embedding = await asyncio.to_thread(lookup_cached_response, message, model)
+
+            if cached is not None:
+                chat_response = cached
+                yield sse_event({"delta": cached})
+            else:
+                parts: List[str] = []
+                async for delta in stream_groq_api(message, model):
+                    parts.append(delta)
+                    yield sse_event({"delta": delta})
+                chat_response = "".join(parts)
+                store_cached_response(embedding, chat_response, model)
+
+            conv_id, chat_response = await finish_chat_turn(
+                conversation_id, message, chat_response, user_email, contact_intent, message_lower
+            )
+            yield sse_event({"done": True, "conversation_id": conv_id, "response": chat_response})
+        except Exception as e:
+            logger.error(f"Chat stream error: {str(e)}")
+            yield sse_event({"error": f"An error occurred: {str(e)}"})
+
+    # Stop proxies (nginx buffers by default) and caches from holding back events
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return Response(generate(), mimetype="text/event-stream", headers=headers)
+
 @app.route('/api/chat', methods=['POST'])
-def chat():
+@app.route('/api/chat/stream', methods=['POST'])
+async def chat():
+    data = await read_json_body()
     try:
-        data = request.get_json()
-        print(data)
+        logger.debug("Chat request: %s", data)
 
         message=data.get("message")
         conversation_id=data.get("conversation_id")
@@ -227,158 +1189,152 @@ def chat():
                 response="",
                 error="Message is required"
             ).to_dict()), 400
-        
-        
-        chat_response = call_groq_api(message)
-        
 
-        # --- Persist conversation ----
-        if not conversation_id:
-            conversation_id = str(uuid.uuid4())
+        # Lowercase once and share it with all the keyword matching below
+        message_lower = message.lower()
+        contact_intent = detect_contact_intent(message, message_lower)
 
-        # Initialise conversation list if new
-        conv_history = conversations.setdefault(conversation_id, [])
-        conv_history.append({"role": "user", "content": message})
-        conv_history.append({"role": "assistant", "content": chat_response})
+        if wants_stream(data):
+            return stream_chat(message, conversation_id, user_email, contact_intent, message_lower)
 
-        # Store some lightweight metadata (timestamp of last activity)
-        conversation_metadata[conversation_id] = {
-            "updated_at": datetime.now()
-        }
+        # Contact requests carry personal details, so never serve or store
+        # them through the shared semantic cache
+        chat_response, embedding = None, None
+        if not contact_intent:
+            # Encoding is CPU-bound, keep it off the event loop
+            chat_response, embedding = await asyncio.to_thread(lookup_cached_response, message)
+        if chat_response is None:
+            chat_response = await coalesced_groq_call(message, embedding)
 
-        # Handle contact intent – ensure we have enough info before sending email
-        if detect_contact_intent(message):
-            contact_info = extract_contact_info(message)
-            contact_message = extract_contact_message(message)
-            visitor_email = contact_info.get("email") or user_email
-            visitor_name = contact_info.get("name")
-
-            if not visitor_email:
-                chat_response = (
-                    "I'd be happy to pass your message along to Abu Sayed. "
-                    "Could you please provide your email address or other info so he can get back to you?"
-                )
-            else:
-                send_contact_email(visitor_email, contact_message, name=visitor_name)
-                chat_response += (
-                    "\n\nYour message has been sent to Abu Sayed. "
-                    "Thank you for reaching out - he will respond as soon as possible."
-                )
+        conversation_id, chat_response = await finish_chat_turn(
+            conversation_id, message, chat_response, user_email, contact_intent, message_lower
+        )
 
         return jsonify(ChatResponse(
             response=chat_response ,
             conversation_id=conversation_id
         ).to_dict())
     except Exception as e:
-        print(f"Chat endpoint error: {str(e)}")
+        logger.error(f"Chat endpoint error: {str(e)}")
         return jsonify(ChatResponse(
             response="",
             error=f"An error occurred: {str(e)}"
         ).to_dict()), 500
 
 @app.route('/api/conversation/<conversation_id>', methods=['GET'])
-def get_conversation(conversation_id):
+async def get_conversation(conversation_id):
     """Get conversation history"""
     try:
-        if conversation_id not in conversations:
+        if not await conversation_store.exists(conversation_id):
             return jsonify({'error': 'Conversation not found'}), 404
         
         return jsonify({
             'conversation_id': conversation_id,
-            'messages': conversations[conversation_id],
-            'metadata': conversation_metadata.get(conversation_id, {})
+            'messages': await conversation_store.get_messages(conversation_id),
+            'metadata': format_metadata(await conversation_store.get_metadata(conversation_id))
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/conversation/<conversation_id>', methods=['DELETE'])
-def delete_conversation(conversation_id):
+async def delete_conversation(conversation_id):
     """Delete a conversation"""
     try:
-        if conversation_id in conversations:
-            del conversations[conversation_id]
-        if conversation_id in conversation_metadata:
-            del conversation_metadata[conversation_id]
+        await conversation_store.delete(conversation_id)
         
         return jsonify({'message': 'Conversation deleted successfully'})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/conversations', methods=['GET'])
-def format_conversation_snapshot(conv_id: str) -> str:
+# Display names for the roles we store, so snapshots skip str.title() per line
+ROLE_TITLES = {"user": "User", "assistant": "Assistant", "system": "System"}
+
+def role_title(role: str) -> str:
+    return ROLE_TITLES.get(role) or role.title()
+
+async def format_conversation_snapshot(conv_id: str) -> str:
     """Return a plain-text snapshot of the full conversation."""
-    messages = conversations.get(conv_id, [])
-    lines = [f"Conversation ID: {conv_id}", "="*40]
-    for idx, msg in enumerate(messages, 1):
-        role = msg.get("role", "unknown").title()
-        content = msg.get("content", "")
-        lines.append(f"{idx}. [{role}] {content}")
-    return "\n".join(lines)
+    messages = await conversation_store.get_messages(conv_id)
+    header = f"Conversation ID: {conv_id}\n{'=' * 40}"
+    if not messages:
+        return header
+    return header + "\n" + "\n".join(
+        f"{idx}. [{role_title(msg.get('role', 'unknown'))}] {msg.get('content', '')}"
+        for idx, msg in enumerate(messages, 1)
+    )
 
 
 @app.route('/api/end-conversation', methods=['POST'])
-def end_conversation():
+async def end_conversation():
     """Mark a conversation as finished and email snapshot to admin."""
+    data = await read_json_body()
     try:
-        print("End conversation endpoint called")
-        data = request.get_json()
+        logger.info("End conversation endpoint called")
         conv_id = data.get("conversation_id")
         visitor_email = data.get("user_email")
-        print(conv_id, visitor_email)
+        logger.debug("Ending conversation %s for %s", conv_id, visitor_email)
 
-        if not conv_id or conv_id not in conversations:
+        if not conv_id or not await conversation_store.exists(conv_id):
             return jsonify({"error": "Conversation not found"}), 404
 
-        snapshot_text = format_conversation_snapshot(conv_id)
+        snapshot_text = await format_conversation_snapshot(conv_id)
         send_email(
             subject=f"Conversation snapshot {conv_id}",
             body=snapshot_text,
             user_email=visitor_email,
         )
         # Optionally mark as archived/finished
-        conversation_metadata.setdefault(conv_id, {})["ended_at"] = datetime.now()
+        await conversation_store.update_metadata(conv_id, ended_at=time.time())
 
         return jsonify({"status": "snapshot_sent"})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
-def list_conversations():
+@app.route('/api/conversations', methods=['GET'])
+async def list_conversations():
     """List all conversations"""
     try:
-        result = []
-        for conv_id, messages in conversations.items():
-            last_message = messages[-1] if messages else None
-            result.append({
-                'conversation_id': conv_id,
-                'message_count': len(messages),
-                'last_message': last_message,
-                'metadata': conversation_metadata.get(conv_id, {})
-            })
-        
-        return jsonify(result)
+        summaries = await conversation_store.summaries()
+        for summary in summaries:
+            summary['metadata'] = format_metadata(summary['metadata'])
+        return jsonify(summaries)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+HEALTH_CACHE_TTL = float(os.getenv('HEALTH_CACHE_TTL', '5'))
+_health_cache = {"ts": 0.0, "fields": {}}
+
 @app.route('/api/health', methods=['GET'])
-def health_check():
+async def health_check():
     """Health check endpoint"""
-    return jsonify({
-        'status': 'healthy',
-        'timestamp': datetime.now().isoformat(),
-        'model': GROQ_MODEL,
-        'groq_client_ready': groq_client is not None
+    # Load balancer probes hit this constantly - refresh the static fields at
+    # most every HEALTH_CACHE_TTL seconds, but always report live Groq load
+    now = time.monotonic()
+    if now - _health_cache["ts"] >= HEALTH_CACHE_TTL:
+        _health_cache["fields"] = {
+            'status': 'healthy',
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'model': GROQ_MODEL,
+            'groq_client_ready': groq_client is not None,
+        }
+        _health_cache["ts"] = now
+    body = orjson.dumps({
+        **_health_cache["fields"],
+        'groq_concurrency_limit': int(groq_backpressure.current_limit),
+        'groq_in_flight': groq_backpressure.in_flight
     })
+    return Response(body, mimetype='application/json')
 
 @app.route('/api/test-api', methods=['GET'])
-def test_api():
+async def test_api():
     """Test Groq API connection"""
     try:
         test_messages = [
             {'role': 'user', 'content': 'Hello, can you respond with just "API test successful"?'}
         ]
         
-        response = call_groq_api(test_messages)
+        response = await call_groq_api(test_messages)
         
         return jsonify({
             'status': 'success',
@@ -392,10 +1348,10 @@ def test_api():
         }), 500
 
 @app.route('/api/models', methods=['POST'])
-def list_models():
+async def list_models():
     """List available Groq models"""
     try:
-        available_models = get_available_models()
+        available_models = await get_available_models()
         
         return jsonify({
             'current_model': GROQ_MODEL,
@@ -409,88 +1365,105 @@ def list_models():
             'current_model': GROQ_MODEL
         }), 500
 
+# Models that passed a test call recently, so repeated switches skip the probe
+MODEL_PROBE_TTL = 600
+_model_ok: Dict[str, float] = {}
+
 @app.route('/api/switch-model', methods=['POST'])
-def switch_model():
+async def switch_model():
     """Switch to a different model (for testing)"""
+    data = await read_json_body()
     try:
-        data = request.get_json()
         new_model = data.get('model')
         
         if not new_model:
             return jsonify({'error': 'Model name is required'}), 400
         
-        # Test the new model
-        test_messages = [{'role': 'user', 'content': 'Hello'}]
-        
-        # Temporarily switch model for testing
         global GROQ_MODEL
         old_model = GROQ_MODEL
-        GROQ_MODEL = new_model
+        response = None
         
-        try:
-            response = call_groq_api(test_messages)
-            return jsonify({
-                'status': 'success',
-                'message': f'Successfully switched to {new_model}',
-                'test_response': response,
-                'old_model': old_model,
-                'new_model': new_model
-            })
-        except Exception as e:
-            # Revert back to old model if test fails
-            GROQ_MODEL = old_model
-            return jsonify({
-                'status': 'error',
-                'error': f'Failed to switch to {new_model}: {str(e)}',
-                'current_model': GROQ_MODEL
-            }), 400
+        probed_at = _model_ok.get(new_model)
+        if probed_at is None or time.monotonic() - probed_at >= MODEL_PROBE_TTL:
+            # Test the new model explicitly - GROQ_MODEL is untouched until the
+            # test passes, so concurrent chats never see an unverified model
+            test_messages = [{'role': 'user', 'content': 'Hello'}]
+            try:
+                response = await call_groq_api(test_messages, model=new_model)
+            except Exception as e:
+                return jsonify({
+                    'status': 'error',
+                    'error': f'Failed to switch to {new_model}: {str(e)}',
+                    'current_model': GROQ_MODEL
+                }), 400
+            _model_ok[new_model] = time.monotonic()
+        
+        GROQ_MODEL = new_model
+        return jsonify({
+            'status': 'success',
+            'message': f'Successfully switched to {new_model}',
+            'test_response': response,
+            'old_model': old_model,
+            'new_model': new_model
+        })
             
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-if __name__ == '__main__':
-    # Print configuration info
-    print("=" * 60)
-    print("Flask LLM Chat App Configuration (Groq Python Library)")
-    print("=" * 60)
-    print(f"Groq Model: {GROQ_MODEL}")
-    print(f"Email Host: {EMAIL_HOST}")
-    print(f"Admin Email: {ADMIN_EMAIL}")
-    print(f"Groq Client Ready: {groq_client is not None}")
-    print("=" * 60)
-    print("Required Environment Variables:")
-    print("- GROQ_API_KEY: Your Groq API key (get from https://console.groq.com/keys)")
-    print("- EMAIL_USER: Email address for sending notifications")
-    print("- EMAIL_PASSWORD: App password for email")
-    print("- ADMIN_EMAIL: Email address to receive notifications")
-    print("=" * 60)
-    print("Optional Environment Variables:")
-    print("- GROQ_MODEL: Model to use (default: llama-3.1-70b-versatile)")
-    print("  * Change to 'llama-4' when available")
-    print("  * Available: llama-3.1-70b-versatile, llama-3.1-8b-instant, etc.")
-    print("=" * 60)
-    
-    # Test API connection on startup
+@app.after_serving
+async def close_groq_client():
+    """Close pooled Groq connections on shutdown"""
+    if groq_client:
+        await groq_client.close()
+
+async def startup_checks():
+    """Test Groq API connection and list models once the event loop is running"""
     if groq_client:
         try:
             test_messages = [{'role': 'user', 'content': 'Hello'}]
-            response = call_groq_api(test_messages)
-            print("✅ Groq API connection successful!")
-            print(f"Test response: {response[:100]}...")
+            response = await call_groq_api(test_messages)
+            logger.info("✅ Groq API connection successful!")
+            logger.info(f"Test response: {response[:100]}...")
         except Exception as e:
-            print(f"❌ Groq API connection failed: {e}")
-            print("Please check your API key and configuration.")
-            print("Get your API key from: https://console.groq.com/keys")
+            logger.error(f"❌ Groq API connection failed: {e}")
+            logger.error("Please check your API key and configuration.")
+            logger.error("Get your API key from: https://console.groq.com/keys")
     else:
-        print("❌ Groq client not initialized. Please check your API key.")
+        logger.error("❌ Groq client not initialized. Please check your API key.")
     
     # Show available models
     try:
-        models = get_available_models()
-        print(f"Available Llama models: {models}")
+        models = await get_available_models()
+        logger.info(f"Available Llama models: {models}")
     except Exception as e:
-        print(f"Could not fetch models: {e}")
+        logger.warning(f"Could not fetch models: {e}")
+    
+    logger.info("=" * 60)
+
+if __name__ == '__main__':
+    # Print configuration info
+    logger.info("=" * 60)
+    logger.info("Quart LLM Chat App Configuration (Groq Async Python Library)")
+    logger.info("=" * 60)
+    logger.info(f"Groq Model: {GROQ_MODEL}")
+    logger.info(f"Email Host: {EMAIL_HOST}")
+    logger.info(f"Admin Email: {ADMIN_EMAIL}")
+    logger.info(f"Groq Client Ready: {groq_client is not None}")
+    logger.info("=" * 60)
+    logger.info("Required Environment Variables:")
+    logger.info("- GROQ_API_KEY: Your Groq API key (get from https://console.groq.com/keys)")
+    logger.info("- EMAIL_USER: Email address for sending notifications")
+    logger.info("- EMAIL_PASSWORD: App password for email")
+    logger.info("- ADMIN_EMAIL: Email address to receive notifications")
+    logger.info("=" * 60)
+    logger.info("Optional Environment Variables:")
+    logger.info("- GROQ_MODEL: Model to use (default: llama-3.1-70b-versatile)")
+    logger.info("  * Change to 'llama-4' when available")
+    logger.info("  * Available: llama-3.1-70b-versatile, llama-3.1-8b-instant, etc.")
+    logger.info("=" * 60)
     
-    print("=" * 60)
+    # Test API connection once the server's event loop has started
+    app.before_serving(startup_checks)
     
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    # Development server only - use gunicorn.conf.py in production
+    app.run(host='0.0.0.0', port=5000)
\ No newline at end of file
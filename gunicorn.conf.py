@@ -0,0 +1,33 @@
+# Gunicorn configuration for production: gunicorn -c gunicorn.conf.py app:app
+#
+# Each worker runs its own event loop and keeps its own state. Conversations
+# are only shared between workers through Redis, so without REDIS_URL a
+# single worker is started - otherwise a conversation created on one worker
+# would 404 on the next. Even with Redis, /api/switch-model only affects the
+# worker that handled it and every worker loads its own embedding model.
+import multiprocessing
+import os
+
+from dotenv import load_dotenv
+
+# Pick up REDIS_URL etc. from .env the same way app.py does
+load_dotenv()
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+
+# Quart is an ASGI app - uvicorn workers serve it on an asyncio event loop
+worker_class = "uvicorn.workers.UvicornWorker"
+default_workers = multiprocessing.cpu_count() * 2 + 1 if os.getenv('REDIS_URL') else 1
+workers = int(os.getenv('WEB_CONCURRENCY', default_workers))
+
+# Pending connections queued by the kernel while every worker is busy
+backlog = int(os.getenv('GUNICORN_BACKLOG', '2048'))
+
+# LLM completions and streamed responses can legitimately take a while
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv('LOG_LEVEL', 'info').lower()
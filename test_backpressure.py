@@ -0,0 +1,34 @@
+import os
+import time
+
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+from app import BackpressureController
+
+
+def test_burst_of_overloads_cuts_once():
+    """Concurrent 429s from one congestion event halve the limit only once"""
+    controller = BackpressureController(16)
+    dispatched = time.monotonic()
+    for _ in range(16):
+        controller.on_result(0.5, Exception("rate_limit_exceeded"), started=dispatched)
+    assert controller.current_limit == 8
+
+
+def test_latency_cut_does_not_compound_and_recovers():
+    """Slow samples cut the limit once, then healthy calls grow it again"""
+    controller = BackpressureController(16, target_latency=5.0)
+    dispatched = time.monotonic()
+    for _ in range(20):
+        controller.on_result(10.0, started=dispatched)
+    assert controller.current_limit == 8
+
+    for _ in range(9):
+        controller.on_result(1.0, started=time.monotonic())
+    assert controller.current_limit == 8 + 9 * controller.increase
+
+
+if __name__ == "__main__":
+    test_burst_of_overloads_cuts_once()
+    test_latency_cut_does_not_compound_and_recovers()
+    print("✅ Backpressure checks passed")
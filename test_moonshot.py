@@ -1,6 +1,10 @@
 import requests
+import io
 import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
 
 # Load environment variables
 load_dotenv()
@@ -24,12 +28,19 @@ CONFIGS = [
     }
 ]
 
-def test_api_config(config):
-    """Test a specific API configuration"""
+# One session for all tests - configs on the same host reuse a keep-alive
+# connection instead of each paying for a new TCP + TLS handshake. Sessions
+# are safe to share across the executor's threads.
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+
+def test_api_config(config, out=None):
+    """Test a specific API configuration, writing its report to `out`"""
+    out = out or sys.stdout
     api_key = os.getenv('MOONSHOT_API_KEY')
     
     if not api_key:
-        print("❌ MOONSHOT_API_KEY not found in environment variables")
+        print("❌ MOONSHOT_API_KEY not found in environment variables", file=out)
         return False
     
     headers = {
@@ -47,32 +58,32 @@ def test_api_config(config):
     }
     
     try:
-        print(f"\n🔍 Testing {config['name']}...")
-        print(f"   URL: {config['base_url']}/chat/completions")
-        print(f"   Model: {config['model']}")
-        print(f"   API Key: {api_key[:10]}...")
+        print(f"\n🔍 Testing {config['name']}...", file=out)
+        print(f"   URL: {config['base_url']}/chat/completions", file=out)
+        print(f"   Model: {config['model']}", file=out)
+        print(f"   API Key: {api_key[:10]}...", file=out)
         
-        response = requests.post(
+        response = SESSION.post(
             f"{config['base_url']}/chat/completions",
             headers=headers,
             json=payload,
             timeout=30
         )
         
-        print(f"   Status Code: {response.status_code}")
+        print(f"   Status Code: {response.status_code}", file=out)
         
         if response.status_code == 200:
             data = response.json()
             message = data['choices'][0]['message']['content']
-            print(f"   ✅ Success: {message}")
+            print(f"   ✅ Success: {message}", file=out)
             return True
         else:
-            print(f"   ❌ Failed: {response.status_code}")
-            print(f"   Response: {response.text}")
+            print(f"   ❌ Failed: {response.status_code}", file=out)
+            print(f"   Response: {response.text}", file=out)
             return False
             
     except Exception as e:
-        print(f"   ❌ Error: {str(e)}")
+        print(f"   ❌ Error: {str(e)}", file=out)
         return False
 
 def main():
@@ -88,11 +99,16 @@ def main():
     
     print(f"API Key: {api_key[:10]}...")
     
-    # Test different configurations
-    successful_configs = []
+    # Test all configurations concurrently, buffering each report so the
+    # output stays readable, then print them in order
+    buffers = [io.StringIO() for _ in CONFIGS]
+    with ThreadPoolExecutor(max_workers=len(CONFIGS)) as executor:
+        results = list(executor.map(test_api_config, CONFIGS, buffers))
     
-    for config in CONFIGS:
-        if test_api_config(config):
+    successful_configs = []
+    for config, buffer, ok in zip(CONFIGS, buffers, results):
+        print(buffer.getvalue(), end="")
+        if ok:
             successful_configs.append(config)
     
     print("\n" + "=" * 60)